@@ -4,45 +4,187 @@ Text-to-Speech and Voice Cloning Web Application
 A comprehensive TTS tool with ElevenLabs and multilingual support
 """
 
-from flask import Flask, render_template_string, request, send_file, jsonify, flash, redirect, url_for
+from flask import Flask, Request, Response, request, send_file, send_from_directory, jsonify, flash, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
 import os
 import tempfile
 import uuid
+import secrets
+import itertools
+import hashlib
+import subprocess
+import shutil
 from werkzeug.utils import secure_filename
-import speech_recognition as sr
-from pydub import AudioSegment
+from werkzeug.exceptions import NotFound
 import io
+import re
+import gzip
 import base64
 import threading
+import functools
+import weakref
+import heapq
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import time
 from datetime import datetime
 import platform
+import logging
+import logging.handlers
+import queue
+import atexit
+from types import MappingProxyType
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import quote as url_quote
 import json
 
 from dotenv import load_dotenv
 
+try:
+    import brotli  # optional: pip install brotli for smaller text responses
+except ImportError:
+    brotli = None
+
+try:
+    import orjson  # optional: pip install orjson for faster JSON responses
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
+# Log through a queue so request threads never wait on the stderr lock;
+# a background listener thread does the actual writing
+log_queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, _log_handler)
+# The QueueHandler must pass the bare message through; basicConfig would
+# otherwise give it a default formatter and every line gets two prefixes
+_queue_handler = logging.handlers.QueueHandler(log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# Create necessary directories
-UPLOAD_FOLDER = 'uploads'
-OUTPUT_FOLDER = 'output'
+# Response compression for text payloads (the inline page is ~25 KB)
+COMPRESS_MIMETYPES = {'text/html', 'text/css', 'application/json', 'application/javascript'}
+COMPRESS_LEVEL = 6
+BROTLI_QUALITY = 5  # similar CPU cost to gzip level 6, ~15% smaller output
+COMPRESS_MIN_SIZE = 500
+
+# Create necessary directories (point OUTPUT_FOLDER at a tmpfs mount to
+# keep generated audio in RAM)
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+OUTPUT_FOLDER = os.environ.get('OUTPUT_FOLDER', 'output')
 for folder in [UPLOAD_FOLDER, OUTPUT_FOLDER]:
     os.makedirs(folder, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 
+# Behind a reverse proxy, let it send audio files with sendfile(2) instead
+# of copying them through Python: USE_X_SENDFILE=1 for Apache/lighttpd
+# (X-Sendfile), or an internal nginx location mapped to OUTPUT_FOLDER, e.g.
+#   location /internal_downloads/ { internal; alias /path/to/output/; }
+# with X_ACCEL_REDIRECT_PREFIX=/internal_downloads/
+app.use_x_sendfile = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX')
+
+class UploadRequest(Request):
+    """Request that spools file uploads straight into UPLOAD_FOLDER
+    
+    Werkzeug buffers uploads in memory or a temp file that file.save() then
+    copies; spooling them next to their destination lets save_upload()
+    rename them into place instead. Every spool file is recorded so the
+    teardown can delete it even when parsing the body was aborted.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        f = tempfile.NamedTemporaryFile('wb+', dir=app.config['UPLOAD_FOLDER'],
+                                        suffix='.upload', delete=False)
+        self.__dict__.setdefault('spooled_files', []).append(f)
+        return f
+
+app.request_class = UploadRequest
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify() and request.get_json() through orjson, keys sorted like Flask's default"""
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
 # ElevenLabs Configuration
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
+# (connect, read) timeouts so a stalled upstream can't pin a worker forever
+ELEVENLABS_TIMEOUT = (5, 60)
+ELEVENLABS_VOICES_TIMEOUT = (5, 10)
+ELEVENLABS_POOL_SIZE = int(os.environ.get('ELEVENLABS_POOL_SIZE', 50))  # keep-alive connections
+STREAM_CHUNK_SIZE = 64 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024  # coalesce small network chunks into few write() calls
+VOICES_CACHE_TTL = 300  # seconds; the voice list rarely changes
+VOICES_WAIT_TIMEOUT = 60  # seconds a caller waits on another thread's voice fetch
+# Longest text accepted for one synthesis (ElevenLabs' own per-request limit)
+MAX_TTS_CHARS = int(os.environ.get('MAX_TTS_CHARS', 5000))
+# Sample sentence for "Test Voice"; the page hands it to static/app.js
+TEST_VOICE_TEXT = "Hello, this is a voice test using ElevenLabs AI. How does this sound?"
 
-# Supported languages for different engines
-SUPPORTED_LANGUAGES = {
+# Speech recognition input format; ffmpeg resamples to it in a single pass
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+FFMPEG_PATH = shutil.which(FFMPEG_BINARY)  # None: fall back to pydub
+STT_SAMPLE_RATE = 16000
+# Uploads speech_recognition reads itself (PCM WAV via the wave module, FLAC),
+# so they skip the ffmpeg subprocess
+STT_NATIVE_EXTENSIONS = frozenset({'wav', 'flac'})
+
+# Voice clone samples are uploaded as mono MP3 at this rate/bitrate
+CLONE_SAMPLE_RATE = 22050
+CLONE_BITRATE = '96k'
+# Upload MIME types; compressed formats are already small and ElevenLabs
+# accepts them, so only lossless WAV/FLAC samples are transcoded
+CLONE_MIMETYPES = MappingProxyType({
+    'mp3': 'audio/mpeg',
+    'ogg': 'audio/ogg',
+    'm4a': 'audio/mp4',
+    'wav': 'audio/wav',
+    'flac': 'audio/flac'
+})
+CLONE_PASSTHROUGH_EXTENSIONS = frozenset({'mp3', 'ogg', 'm4a'})
+
+# Uploads and generated audio are removed once unused for FILE_MAX_AGE
+FILE_MAX_AGE = 3600  # seconds
+CLEANUP_INTERVAL = 300  # seconds
+# Size cap for the output folder; least recently used audio is evicted first
+OUTPUT_MAX_BYTES = int(os.environ.get('OUTPUT_MAX_BYTES', 500 * 1024 * 1024))
+
+# Background jobs for slow ElevenLabs calls
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 8))
+SPEECH_JOB_WORKERS = int(os.environ.get('SPEECH_JOB_WORKERS', 8))
+JOB_TTL = 3600  # seconds a finished job's result stays available
+# Transcripts remembered per uploaded file, so re-uploading the same sample
+# skips Google recognition
+TRANSCRIPT_CACHE_SIZE = 256
+TRANSCRIPT_CACHE_TTL = 3600  # seconds
+
+# Generated audio never changes under its filename, so downloads may be cached for good
+DOWNLOAD_MAX_AGE = 365 * 24 * 3600
+
+# Supported languages for different engines (read-only)
+SUPPORTED_LANGUAGES = MappingProxyType({
     'en': 'English',
     'es': 'Spanish', 
     'fr': 'French',
@@ -66,13 +208,145 @@ SUPPORTED_LANGUAGES = {
     'et': 'Estonian',
     'lv': 'Latvian',
     'lt': 'Lithuanian'
-}
+})
 
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {'wav', 'mp3', 'ogg', 'm4a', 'flac'}
+ALLOWED_EXTENSIONS = frozenset({'wav', 'mp3', 'ogg', 'm4a', 'flac'})
+
+_name_counter = itertools.count()
+
+def unique_token():
+    """Short token for file names: a per-process counter never repeats
+    within the process, the random tail separates workers and restarts"""
+    return f"{next(_name_counter):06x}{secrets.token_hex(4)}"
+
+def file_extension(filename):
+    """Lowercase extension without the dot, '' if there is none"""
+    return os.path.splitext(filename)[1][1:].lower()
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return file_extension(filename) in ALLOWED_EXTENSIONS
+
+def save_upload(file, filepath):
+    """Move an uploaded file to filepath, renaming the spooled copy when possible"""
+    spooled_path = getattr(file.stream, 'name', None)
+    if isinstance(spooled_path, str) and os.path.exists(spooled_path):
+        file.stream.close()
+        os.replace(spooled_path, filepath)
+    else:
+        # 1 MiB copy chunks instead of Werkzeug's 16 KiB default
+        file.save(filepath, buffer_size=WRITE_BUFFER_SIZE)
+    upload_files.track(filepath)
+
+def touch_cached_file(filepath):
+    """Mark a cached file as just used so cleanup keeps it; False if it doesn't exist"""
+    try:
+        os.utime(filepath)
+        return True
+    except FileNotFoundError:
+        return False
+
+# speech_recognition and pydub are only needed once someone transcribes a
+# file, so they are imported on first use instead of at worker startup
+@functools.lru_cache(maxsize=None)
+def get_speech_recognition():
+    import speech_recognition
+    return speech_recognition
+
+@functools.lru_cache(maxsize=None)
+def get_audio_segment():
+    from pydub import AudioSegment
+    return AudioSegment
+
+def decode_pcm(audio_file_path):
+    """Decode an audio file to STT_SAMPLE_RATE mono 16-bit PCM bytes"""
+    if FFMPEG_PATH:
+        # One ffmpeg pass straight to stdout, no intermediate WAV file on disk
+        proc = subprocess.run([FFMPEG_PATH, '-nostdin', '-loglevel', 'error',
+                               '-i', audio_file_path,
+                               '-ac', '1', '-ar', str(STT_SAMPLE_RATE), '-f', 's16le', '-'],
+                              capture_output=True, check=True)
+        return proc.stdout
+    
+    # No ffmpeg binary: pydub still reads WAV itself and can use avconv.
+    # The samples go to sr.AudioData as raw PCM, never through a WAV export;
+    # naming the format lets pydub read WAV natively without probing it first.
+    audio = get_audio_segment().from_file(audio_file_path, format=file_extension(audio_file_path) or None)
+    return audio.set_channels(1).set_frame_rate(STT_SAMPLE_RATE).set_sample_width(2).raw_data
+
+class FileExpiryQueue:
+    """Min-heap of (expires_at, path) for the files in one folder
+    
+    Files are queued as they are written, so cleanup only looks at the head
+    of the heap instead of stat-ing every file on every pass. Cache hits bump
+    a file's mtime; its entry is requeued when it comes due.
+    """
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._heap = []
+        self._sizes = {}  # path -> size of every file with a heap entry
+        self._lock = threading.Lock()
+    
+    def after_fork(self):
+        """Replace the lock, which another thread may have held when the process forked"""
+        self._lock = threading.Lock()
+    
+    def track(self, filepath, size=0, last_used=None):
+        """Queue filepath for removal FILE_MAX_AGE after its last use"""
+        expires_at = (last_used or time.time()) + FILE_MAX_AGE
+        with self._lock:
+            if filepath not in self._sizes:
+                heapq.heappush(self._heap, (expires_at, filepath))
+            self.total_bytes += size - self._sizes.get(filepath, 0)
+            self._sizes[filepath] = size
+    
+    def scan(self, folder):
+        """Queue files on disk nobody tracked (left by a previous run or a crash)"""
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.path not in self._sizes:
+                    stat = entry.stat()
+                    self.track(entry.path, stat.st_size, stat.st_mtime)
+    
+    def next_expiry(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+    
+    def remove_expired(self):
+        """Remove due files, then least recently used ones while over max_bytes"""
+        current_time = time.time()
+        while True:
+            with self._lock:
+                if not self._heap:
+                    return
+                expires_at, filepath = self._heap[0]
+                over_size = self.max_bytes is not None and self.total_bytes > self.max_bytes
+                if expires_at > current_time and not over_size:
+                    return
+                heapq.heappop(self._heap)
+                size = self._sizes.pop(filepath, 0)
+                self.total_bytes -= size
+            
+            try:
+                last_used = os.stat(filepath).st_mtime
+            except FileNotFoundError:
+                continue  # already gone, e.g. an upload its job removed
+            
+            # Reused since it was queued: requeue at its real expiry (or
+            # further back in LRU order when evicting for size)
+            if last_used + FILE_MAX_AGE > expires_at:
+                self.track(filepath, size, last_used)
+                continue
+            
+            try:
+                os.remove(filepath)
+                logger.info("Cleaned up old file: %s", os.path.basename(filepath))
+            except FileNotFoundError:
+                pass
+
+upload_files = FileExpiryQueue()
+output_files = FileExpiryQueue(max_bytes=OUTPUT_MAX_BYTES)
 
 class ElevenLabsAPI:
     def __init__(self, api_key):
@@ -83,6 +357,22 @@ class ElevenLabsAPI:
             "Content-Type": "application/json",
             "xi-api-key": api_key
         }
+        # One pooled session so keep-alive connections (and their TLS
+        # handshakes) are reused across requests
+        self.session = self.new_session()
+    
+    def new_session(self):
+        """Pooled session for ElevenLabs calls with retries on transient errors"""
+        session = requests.Session()
+        session.headers.update({"xi-api-key": self.api_key or ""})
+        retries = Retry(total=3, backoff_factor=0.2,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        raise_on_status=False)
+        # Everything goes to one host, so a single pool sized for the number
+        # of concurrent ElevenLabs calls is enough
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=ELEVENLABS_POOL_SIZE,
+                                              max_retries=retries))
+        return session
     
     def get_voices(self):
         """Get available ElevenLabs voices"""
@@ -90,8 +380,8 @@ class ElevenLabsAPI:
             if not self.api_key:
                 return []
             
-            response = requests.get(f"{self.base_url}/voices", 
-                                  headers={"xi-api-key": self.api_key})
+            response = self.session.get(f"{self.base_url}/voices",
+                                        timeout=ELEVENLABS_VOICES_TIMEOUT)
             
             if response.status_code == 200:
                 voices_data = response.json()
@@ -107,55 +397,92 @@ class ElevenLabsAPI:
                     })
                 return voices
             else:
-                print(f"Error fetching ElevenLabs voices: {response.status_code}")
+                logger.warning("Error fetching ElevenLabs voices: %s", response.status_code)
                 return []
-        except Exception as e:
-            print(f"Error in get_voices: {e}")
+        except Exception:
+            logger.exception("Error in get_voices")
             return []
     
-    def text_to_speech(self, text, voice_id, stability=0.5, similarity_boost=0.5, style=0.0):
-        """Generate speech using ElevenLabs API"""
+    def _speech_payload(self, text, stability, similarity_boost, style):
+        """Request body shared by the TTS endpoints"""
+        return {
+            "text": text,
+            "model_id": "eleven_multilingual_v2",  # Supports multiple languages
+            "voice_settings": {
+                "stability": stability,
+                "similarity_boost": similarity_boost,
+                "style": style,
+                "use_speaker_boost": True
+            }
+        }
+    
+    def _error_message(self, response, prefix):
+        """Error text for a failed API response, with the detail message if it sent one"""
+        error_msg = f"{prefix}: {response.status_code}"
+        try:
+            error_data = response.json()
+            error_msg += f" - {error_data.get('detail', {}).get('message', 'Unknown error')}"
+        except (ValueError, AttributeError):
+            pass
+        return error_msg
+    
+    def text_to_speech(self, text, voice_id, stability=0.5, similarity_boost=0.5, style=0.0, filepath=None):
+        """Generate speech using ElevenLabs API, saving it to filepath (random name if omitted)"""
         try:
             if not self.api_key:
                 raise Exception("ElevenLabs API key not provided")
             
             url = f"{self.base_url}/text-to-speech/{voice_id}"
+            data = self._speech_payload(text, stability, similarity_boost, style)
             
-            data = {
-                "text": text,
-                "model_id": "eleven_multilingual_v2",  # Supports multiple languages
-                "voice_settings": {
-                    "stability": stability,
-                    "similarity_boost": similarity_boost,
-                    "style": style,
-                    "use_speaker_boost": True
-                }
-            }
-            
-            response = requests.post(url, json=data, headers=self.headers)
-            
-            if response.status_code == 200:
-                # Save audio file
-                filename = f"elevenlabs_{uuid.uuid4().hex[:8]}.mp3"
-                filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                return filepath
-            else:
-                error_msg = f"ElevenLabs API error: {response.status_code}"
-                try:
-                    error_data = response.json()
-                    error_msg += f" - {error_data.get('detail', {}).get('message', 'Unknown error')}"
-                except:
-                    pass
-                raise Exception(error_msg)
+            with self.session.post(url, json=data, headers=self.headers, stream=True,
+                                   timeout=ELEVENLABS_TIMEOUT) as response:
+                if response.status_code == 200:
+                    if filepath is None:
+                        filename = f"elevenlabs_{unique_token()}.mp3"
+                        filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
+                    
+                    # Stream audio straight to disk instead of buffering it in memory,
+                    # then rename so a partial file is never visible under filepath
+                    tmp_path = f"{filepath}.{unique_token()}.part"
+                    try:
+                        with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                                f.write(chunk)
+                        os.replace(tmp_path, filepath)
+                    except BaseException:
+                        # Don't leave a partial file behind for the cleanup scan
+                        try:
+                            os.remove(tmp_path)
+                        except FileNotFoundError:
+                            pass
+                        raise
+                    output_files.track(filepath, os.path.getsize(filepath))
+                    
+                    return filepath
+                else:
+                    raise Exception(self._error_message(response, "ElevenLabs API error"))
                 
-        except Exception as e:
-            print(f"Error in ElevenLabs TTS: {e}")
+        except Exception:
+            logger.exception("Error in ElevenLabs TTS")
             return None
     
+    def open_speech_stream(self, text, voice_id, stability=0.5, similarity_boost=0.5, style=0.0):
+        """Start a streaming TTS request; returns the open response, audio arrives as it is synthesized"""
+        if not self.api_key:
+            raise Exception("ElevenLabs API key not provided")
+        
+        url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
+        data = self._speech_payload(text, stability, similarity_boost, style)
+        
+        response = self.session.post(url, json=data, headers=self.headers, stream=True,
+                                     timeout=ELEVENLABS_TIMEOUT)
+        if response.status_code != 200:
+            error_msg = self._error_message(response, "ElevenLabs API error")
+            response.close()
+            raise Exception(error_msg)
+        return response
+    
     def clone_voice(self, audio_file_path, voice_name, description="Custom cloned voice"):
         """Clone a voice from audio sample"""
         try:
@@ -164,13 +491,8 @@ class ElevenLabsAPI:
             
             url = f"{self.base_url}/voices/add"
             
-            # Read audio file
-            with open(audio_file_path, 'rb') as f:
-                audio_data = f.read()
-            
-            files = {
-                'files': ('sample.mp3', audio_data, 'audio/mpeg')
-            }
+            ext = file_extension(audio_file_path)
+            mimetype = CLONE_MIMETYPES.get(ext, 'application/octet-stream')
             
             data = {
                 'name': voice_name,
@@ -178,69 +500,380 @@ class ElevenLabsAPI:
                 'labels': json.dumps({"custom": "true"})
             }
             
-            headers = {"xi-api-key": self.api_key}
-            
-            response = requests.post(url, files=files, data=data, headers=headers)
+            with open(audio_file_path, 'rb') as f:
+                files = {
+                    'files': (f'sample.{ext}', f, mimetype)
+                }
+                response = self.session.post(url, files=files, data=data,
+                                             timeout=ELEVENLABS_TIMEOUT)
             
             if response.status_code == 200:
                 result = response.json()
                 return result.get('voice_id')
             else:
-                error_msg = f"Voice cloning error: {response.status_code}"
-                try:
-                    error_data = response.json()
-                    error_msg += f" - {error_data.get('detail', {}).get('message', 'Unknown error')}"
-                except:
-                    pass
-                raise Exception(error_msg)
+                raise Exception(self._error_message(response, "Voice cloning error"))
                 
-        except Exception as e:
-            print(f"Error in voice cloning: {e}")
+        except Exception:
+            logger.exception("Error in voice cloning")
             return None
 
 class TTSEngine:
     def __init__(self):
         self.elevenlabs = ElevenLabsAPI(ELEVENLABS_API_KEY)
         self.custom_voices = {}
-        
+        self._voices_cache = (0.0, [])  # (expires_at, voices)
+        self._voices_lock = threading.Lock()
+        self._voices_future = None  # in-flight voice fetch shared by concurrent callers
+        self._voices_generation = 0  # bumped by invalidate_voices()
+        # cache key -> lock serializing identical requests; an entry goes away
+        # once no request holds its lock, so the map doesn't grow forever
+        self._tts_locks = weakref.WeakValueDictionary()
+        self._tts_locks_guard = threading.Lock()
+        self._recognizer = None
+        
+    @property
+    def recognizer(self):
+        """Speech recognizer, built on first use and shared by all STT jobs"""
+        if self._recognizer is None:
+            recognizer = get_speech_recognition().Recognizer()
+            # Files are transcribed whole; never recalibrate the threshold
+            recognizer.dynamic_energy_threshold = False
+            self._recognizer = recognizer
+        return self._recognizer
+    
     def get_elevenlabs_voices(self):
-        """Get available ElevenLabs voices"""
-        return self.elevenlabs.get_voices()
+        """Get available ElevenLabs voices, cached for VOICES_CACHE_TTL seconds"""
+        expires_at, voices = self._voices_cache
+        if time.monotonic() < expires_at:
+            return voices
+        
+        # Single-flight: on a miss only one thread calls ElevenLabs,
+        # concurrent callers wait for its result
+        with self._voices_lock:
+            expires_at, voices = self._voices_cache
+            if time.monotonic() < expires_at:
+                return voices
+            future = self._voices_future
+            if future is None:
+                future = self._voices_future = Future()
+                generation = self._voices_generation
+                leader = True
+            else:
+                leader = False
+        
+        if not leader:
+            try:
+                return future.result(timeout=VOICES_WAIT_TIMEOUT)
+            except FutureTimeoutError:
+                logger.warning("Timed out waiting for the ElevenLabs voice list")
+                return []
+        
+        try:
+            voices = self.elevenlabs.get_voices()
+            # Don't cache failures, so a transient API error doesn't stick for minutes.
+            # Nor a list fetched before an invalidation (e.g. a clone finishing
+            # mid-fetch), which may be missing the new voice.
+            if voices:
+                with self._voices_lock:
+                    if self._voices_generation == generation:
+                        self._voices_cache = (time.monotonic() + VOICES_CACHE_TTL, voices)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(voices)
+        finally:
+            with self._voices_lock:
+                if self._voices_future is future:
+                    self._voices_future = None
+        return voices
+    
+    def speech_cache_path(self, text, voice_id, stability=0.5, similarity_boost=0.5, style=0.0):
+        """Output path for generated speech, derived from everything that affects the audio"""
+        key = hashlib.sha256(f"{voice_id}|{stability}|{similarity_boost}|{style}|{text}".encode()).hexdigest()[:16]
+        return os.path.join(app.config['OUTPUT_FOLDER'], f"el_{key}.mp3")
+    
+    def speech_lock(self, filepath):
+        """Lock held while the audio for filepath is being synthesized
+        
+        Concurrent identical requests (jobs and streams alike) wait on it for
+        the first one's file instead of each calling ElevenLabs.
+        """
+        with self._tts_locks_guard:
+            return self._tts_locks.setdefault(filepath, threading.Lock())
     
     def text_to_speech_elevenlabs(self, text, voice_id, stability=0.5, similarity_boost=0.5, style=0.0):
-        """Generate speech using ElevenLabs"""
-        return self.elevenlabs.text_to_speech(text, voice_id, stability, similarity_boost, style)
+        """Generate speech using ElevenLabs, reusing audio already generated for the same input"""
+        filepath = self.speech_cache_path(text, voice_id, stability, similarity_boost, style)
+        if touch_cached_file(filepath):
+            return filepath
+        
+        with self.speech_lock(filepath):
+            if touch_cached_file(filepath):
+                return filepath
+            return self.elevenlabs.text_to_speech(text, voice_id, stability, similarity_boost, style,
+                                                  filepath=filepath)
+    
+    def stream_speech_elevenlabs(self, text, voice_id, stability=0.5, similarity_boost=0.5, style=0.0):
+        """Stream speech from ElevenLabs as it is synthesized
+        
+        Returns (chunks, release): a generator of MP3 chunks and a callable
+        the caller must run when the response is closed. The complete audio
+        is also saved under speech_cache_path so replays and downloads skip
+        the API. Holds the speech_lock for the key until released, so an
+        identical request waits and then finds the cached file; returns None
+        if that file already exists once the lock is acquired.
+        """
+        filepath = self.speech_cache_path(text, voice_id, stability, similarity_boost, style)
+        lock = self.speech_lock(filepath)
+        lock.acquire()
+        if touch_cached_file(filepath):
+            lock.release()
+            return None
+        
+        try:
+            response = self.elevenlabs.open_speech_stream(text, voice_id, stability, similarity_boost, style)
+        except Exception:
+            lock.release()
+            raise
+        
+        released = False
+        
+        def release():
+            # Runs from the generator's finally and again on response close;
+            # the latter covers a generator that never started
+            nonlocal released
+            if not released:
+                released = True
+                response.close()
+                lock.release()
+        
+        def chunks():
+            tmp_path = f"{filepath}.{unique_token()}.part"
+            size = 0
+            try:
+                with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                    # chunk_size=None hands over data as soon as it arrives
+                    for chunk in response.iter_content(chunk_size=None):
+                        f.write(chunk)
+                        size += len(chunk)
+                        yield chunk
+                os.replace(tmp_path, filepath)
+                output_files.track(filepath, size)
+            finally:
+                # Client went away mid-stream: drop the partial file
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                release()
+        
+        return chunks(), release
     
     def speech_to_text(self, audio_file_path):
         """Convert speech to text"""
         try:
-            r = sr.Recognizer()
+            sr = get_speech_recognition()
+            r = self.recognizer
             
-            # Convert audio to WAV if needed
-            audio = AudioSegment.from_file(audio_file_path)
-            wav_path = audio_file_path.rsplit('.', 1)[0] + '_converted.wav'
-            audio.export(wav_path, format="wav")
+            audio_data = None
+            if file_extension(audio_file_path) in STT_NATIVE_EXTENSIONS:
+                try:
+                    with sr.AudioFile(audio_file_path) as source:
+                        audio_data = r.record(source)
+                except (ValueError, OSError):
+                    pass  # e.g. a compressed codec in a WAV container; ffmpeg handles it
             
-            with sr.AudioFile(wav_path) as source:
-                audio_data = r.record(source)
-                text = r.recognize_google(audio_data)
-                
-            # Clean up converted file
-            if os.path.exists(wav_path):
-                os.remove(wav_path)
+            if audio_data is None:
+                audio_data = sr.AudioData(decode_pcm(audio_file_path), STT_SAMPLE_RATE, 2)
+            text = r.recognize_google(audio_data)
                 
             return text
-        except Exception as e:
-            print(f"Error in speech recognition: {e}")
+        except Exception:
+            logger.exception("Error in speech recognition")
             return None
     
+    def after_fork(self):
+        """Reset state inherited from a parent process mid-use
+        
+        A voice fetch in flight at fork time leaves a Future nothing will
+        ever resolve, and locks held by the parent's threads stay held.
+        """
+        self._voices_lock = threading.Lock()
+        self._voices_future = None
+        self._voices_cache = (0.0, [])
+        self._tts_locks = weakref.WeakValueDictionary()
+        self._tts_locks_guard = threading.Lock()
+        # Don't close the inherited pool; that would shut the parent's sockets
+        self.elevenlabs.session = self.elevenlabs.new_session()
+    
+    def invalidate_voices(self):
+        """Drop the cached voice list so the next lookup refetches it"""
+        with self._voices_lock:
+            self._voices_generation += 1
+            self._voices_cache = (0.0, [])
+            # Later callers start a fresh fetch instead of joining a stale one
+            self._voices_future = None
+    
     def clone_voice_from_audio(self, audio_file_path, voice_name, description=""):
         """Clone voice using ElevenLabs"""
-        return self.elevenlabs.clone_voice(audio_file_path, voice_name, description)
+        voice_id = self.elevenlabs.clone_voice(audio_file_path, voice_name, description)
+        if voice_id:
+            # The new voice must show up right away, not after the TTL
+            self.invalidate_voices()
+        return voice_id
 
 # Initialize TTS engine
 tts_engine = TTSEngine()
 
+# Background job queue: routes submit slow work here and return a job id
+# immediately, the browser polls /status/<job_id> for the result
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+# TTS gets its own pool so short syntheses are dispatched at once instead of
+# queueing behind multi-second uploads, decodes and clones
+speech_executor = ThreadPoolExecutor(max_workers=SPEECH_JOB_WORKERS, thread_name_prefix='speech')
+jobs = {}  # job_id -> (created_at, Future)
+speech_jobs = {}  # speech cache path -> id of the job producing it
+speech_jobs_lock = threading.Lock()
+
+def submit_job(fn, *args, executor=job_executor):
+    """Run fn(*args) in the background and return its job id"""
+    job_id = uuid.uuid4().hex
+    jobs[job_id] = (time.time(), executor.submit(fn, *args))
+    return job_id
+
+def submit_speech_job(text, voice_id, stability=0.5, similarity=0.5, style=0.0):
+    """Queue speech generation; identical requests still pending share one job"""
+    filepath = tts_engine.speech_cache_path(text, voice_id, stability, similarity, style)
+    with speech_jobs_lock:
+        job = jobs.get(speech_jobs.get(filepath))
+        if job is not None and not job[1].done():
+            return speech_jobs[filepath]
+        job_id = submit_job(render_speech, text, voice_id, stability, similarity, style,
+                            executor=speech_executor)
+        speech_jobs[filepath] = job_id
+    return job_id
+
+def render_speech(text, voice_id, stability=0.5, similarity=0.5, style=0.0):
+    """Background job: generate speech and return the output filename"""
+    filepath = tts_engine.text_to_speech_elevenlabs(text, voice_id, stability, similarity, style)
+    if not filepath:
+        raise Exception('Failed to generate speech')
+    return {'filename': os.path.basename(filepath)}
+
+transcripts = OrderedDict()  # upload digest -> (expires_at, text), least recently used first
+transcripts_lock = threading.Lock()
+
+def file_digest(filepath):
+    """BLAKE2b digest of a file's contents, read in WRITE_BUFFER_SIZE chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(WRITE_BUFFER_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def transcribe_upload(filepath):
+    """Background job: transcribe an uploaded audio file, then delete it"""
+    try:
+        key = file_digest(filepath)
+        with transcripts_lock:
+            expires_at, text = transcripts.get(key, (0.0, None))
+            if time.monotonic() < expires_at:
+                transcripts.move_to_end(key)
+            else:
+                text = None
+        
+        if text is None:
+            text = tts_engine.speech_to_text(filepath)
+            # Failures aren't cached, so a transient API error can be retried
+            if text:
+                with transcripts_lock:
+                    transcripts[key] = (time.monotonic() + TRANSCRIPT_CACHE_TTL, text)
+                    transcripts.move_to_end(key)
+                    while len(transcripts) > TRANSCRIPT_CACHE_SIZE:
+                        transcripts.popitem(last=False)
+    finally:
+        os.remove(filepath)
+    
+    if not text:
+        raise Exception('Could not recognize speech')
+    return {'text': text}
+
+def clone_upload(filepath, voice_name, voice_description=""):
+    """Background job: clone a voice from an uploaded sample, then delete it"""
+    try:
+        # Lossless samples become mono MP3 (ElevenLabs clones from mono
+        # speech); stereo 44.1/48 kHz WAVs shrink by an order of magnitude.
+        # One ffmpeg pass decodes, downmixes, resamples and encodes frame by
+        # frame, without holding the decoded samples in Python. Compressed
+        # uploads are sent as-is: re-encoding lossy audio only loses quality.
+        if file_extension(filepath) not in CLONE_PASSTHROUGH_EXTENSIONS:
+            mp3_path = os.path.splitext(filepath)[0] + '_clone.mp3'
+            subprocess.run([FFMPEG_BINARY, '-nostdin', '-loglevel', 'error', '-y',
+                            '-i', filepath,
+                            '-ac', '1', '-ar', str(CLONE_SAMPLE_RATE),
+                            '-codec:a', 'libmp3lame', '-b:a', CLONE_BITRATE, mp3_path],
+                           capture_output=True, check=True)
+            os.remove(filepath)
+            filepath = mp3_path
+        
+        # Clone voice using ElevenLabs
+        voice_id = tts_engine.clone_voice_from_audio(filepath, voice_name, voice_description)
+    finally:
+        os.remove(filepath)
+    
+    if not voice_id:
+        raise Exception('Voice cloning failed')
+    return {
+        'voice_id': voice_id,
+        'voice_name': voice_name,
+        'message': 'Voice cloned successfully!'
+    }
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from CSS"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+def minify_html(html):
+    """Strip comments and collapse whitespace runs in HTML
+    
+    Only safe for markup without <pre>, textarea content or inline scripts,
+    where runs of whitespace render the same as a single space.
+    """
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.S)
+    return re.sub(r'\s+', ' ', html).strip()
+
+def precompressed_response(body, gzipped, mimetype):
+    """Serve a body gzipped ahead of time to clients that accept gzip"""
+    if request.accept_encodings['gzip'] > 0:
+        response = Response(gzipped, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    return response
+
+def load_static_asset(filename, minify=None):
+    """Read a file from the static folder once, returning (body, gzipped body, version)"""
+    with open(os.path.join(app.static_folder, filename), encoding='utf-8') as f:
+        text = f.read()
+    body = (minify(text) if minify else text).encode()
+    return body, gzip.compress(body, compresslevel=9), hashlib.sha256(body).hexdigest()[:12]
+
+# Stylesheet and page script, minified and gzipped once at import; the
+# version hash busts the far-future cache whenever a file changes. A reverse
+# proxy may also serve the static folder directly (e.g. nginx
+# "location /static/ { expires 1y; }").
+STATIC_ASSETS = MappingProxyType({
+    'app.css': load_static_asset('app.css', minify=minify_css),
+    'app.js': load_static_asset('app.js')
+})
+STATIC_MIMETYPES = MappingProxyType({'app.css': 'text/css', 'app.js': 'text/javascript'})
+
 # HTML Templates
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -249,309 +882,15 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Voice Studio - ElevenLabs Edition</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            min-height: 100vh;
-        }
-        
-        .container {
-            background: white;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }
-        
-        .header {
-            background: #4facfe;
-            padding: 30px;
-            text-align: center;
-            color: white;
-        }
-        
-        .header h1 {
-            font-size: 2.5rem;
-            margin-bottom: 10px;
-        }
-        
-        .header p {
-            font-size: 1.1rem;
-            opacity: 0.9;
-        }
-        
-        .api-status {
-            margin-top: 15px;
-            padding: 10px;
-            border-radius: 8px;
-            font-size: 0.9rem;
-        }
-        
-        .api-connected {
-            background: rgba(76, 175, 80, 0.2);
-            border: 1px solid rgba(76, 175, 80, 0.5);
-        }
-        
-        .api-disconnected {
-            background: rgba(244, 67, 54, 0.2);
-            border: 1px solid rgba(244, 67, 54, 0.5);
-        }
-        
-        .content {
-            padding: 40px;
-        }
-        
-        .tabs {
-            display: flex;
-            margin-bottom: 30px;
-            background: #f8f9fa;
-            border-radius: 10px;
-            padding: 5px;
-        }
-        
-        .tab {
-            flex: 1;
-            padding: 15px 20px;
-            text-align: center;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            font-weight: 600;
-        }
-        
-        .tab.active {
-            background: #4facfe;
-            color: white;
-        }
-        
-        .tab-content {
-            display: none;
-        }
-        
-        .tab-content.active {
-            display: block;
-        }
-        
-        .form-group {
-            margin-bottom: 25px;
-        }
-        
-        .form-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #333;
-        }
-        
-        .form-control {
-            width: 100%;
-            padding: 12px 15px;
-            border: 2px solid #e9ecef;
-            border-radius: 8px;
-            font-size: 16px;
-            transition: border-color 0.3s ease;
-        }
-        
-        .form-control:focus {
-            outline: none;
-            border-color: #4facfe;
-        }
-        
-        textarea.form-control {
-            min-height: 120px;
-            resize: vertical;
-        }
-        
-        .btn {
-            background: #4facfe;
-            color: white;
-            border: none;
-            padding: 12px 30px;
-            border-radius: 8px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: transform 0.3s ease;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-        }
-        
-        .btn:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-            transform: none;
-        }
-        
-        .row {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 20px;
-        }
-        
-        .audio-player {
-            margin-top: 20px;
-            padding: 20px;
-            background: #f8f9fa;
-            border-radius: 10px;
-            text-align: center;
-        }
-        
-        .upload-area {
-            border: 2px dashed #4facfe;
-            border-radius: 10px;
-            padding: 40px 20px;
-            text-align: center;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-        
-        .upload-area:hover {
-            background: #f8f9fa;
-        }
-        
-        .upload-area.dragover {
-            background: #ffebee;
-            border-color: #e91e63;
-        }
-        
-        .file-info {
-            margin-top: 15px;
-            padding: 10px;
-            background: #e8f5e8;
-            border-radius: 5px;
-            display: none;
-        }
-        
-        .loading {
-            display: none;
-            text-align: center;
-            padding: 20px;
-        }
-        
-        .spinner {
-            border: 4px solid #f3f3f3;
-            border-top: 4px solid #4facfe;
-            border-radius: 50%;
-            width: 40px;
-            height: 40px;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 10px;
-        }
-        
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-        
-        .voice-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-            gap: 15px;
-            max-height: 400px;
-            overflow-y: auto;
-            padding: 10px;
-            border: 1px solid #e9ecef;
-            border-radius: 8px;
-        }
-        
-        .voice-card {
-            padding: 15px;
-            border: 2px solid #e9ecef;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            background: white;
-        }
-        
-        .voice-card:hover {
-            border-color: #4facfe;
-            transform: translateY(-2px);
-        }
-        
-        .voice-card.selected {
-            border-color: #4facfe;
-            background: #4facfe26;
-        }
-        
-        .voice-name {
-            font-weight: 600;
-            color: #333;
-            margin-bottom: 5px;
-        }
-        
-        .voice-category {
-            font-size: 0.9rem;
-            color: #666;
-            margin-bottom: 8px;
-        }
-        
-        .voice-description {
-            font-size: 0.8rem;
-            color: #888;
-            line-height: 1.4;
-        }
-        
-        .settings-row {
-            display: grid;
-            grid-template-columns: 1fr 1fr 1fr;
-            gap: 15px;
-            margin-bottom: 20px;
-        }
-        
-        .range-group {
-            text-align: center;
-        }
-        
-        .range-group label {
-            font-size: 0.9rem;
-            margin-bottom: 5px;
-        }
-        
-        .range-value {
-            font-weight: 600;
-            color: #4facfe;
-        }
-        
-        @media (max-width: 768px) {
-            .row {
-                grid-template-columns: 1fr;
-            }
-            
-            .settings-row {
-                grid-template-columns: 1fr;
-            }
-            
-            .voice-grid {
-                grid-template-columns: 1fr;
-            }
-            
-            .container {
-                margin: 10px;
-            }
-            
-            .content {
-                padding: 20px;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ url_for('static_asset', filename='app.css', v=versions['app.css']) }}">
 </head>
-<body>
+<body data-test-voice-text="{{ test_voice_text }}">
     <div class="container">
         <div class="header">
             <h1>🎤 Voice Studio</h1>
             <p>Professional Text-to-Speech with ElevenLabs AI</p>
-            <div class="api-status {% if api_connected %}api-connected{% else %}api-disconnected{% endif %}">
-                {% if api_connected %}
-                    ElevenLabs API Connected - {{ voice_count }} voices available
-                {% else %}
-                    ElevenLabs API Key Required - Add ELEVENLABS_API_KEY to environment
-                {% endif %}
+            <div id="api-status" class="api-status">
+                Loading ElevenLabs voices...
             </div>
         </div>
         
@@ -567,21 +906,13 @@ HTML_TEMPLATE = """
                 <form id="tts-form" onsubmit="generateSpeech(event)">
                     <div class="form-group">
                         <label for="text-input">Enter Text to Convert:</label>
-                        <textarea id="text-input" name="text" class="form-control" 
+                        <textarea id="text-input" name="text" class="form-control" maxlength="{{ max_chars }}" 
                                  placeholder="Type your text here..." required></textarea>
                     </div>
                     
                     <div class="form-group">
                         <label>Select Voice:</label>
-                        <div class="voice-grid" id="voice-selection">
-                            {% for voice in elevenlabs_voices %}
-                            <div class="voice-card" onclick="selectVoice('{{ voice.id }}', this)" data-voice-id="{{ voice.id }}">
-                                <div class="voice-name">{{ voice.name }}</div>
-                                <div class="voice-category">{{ voice.category }}</div>
-                                <div class="voice-description">{{ voice.description[:100] }}...</div>
-                            </div>
-                            {% endfor %}
-                        </div>
+                        <div class="voice-grid" id="voice-selection"></div>
                         <input type="hidden" id="selected-voice" name="voice_id" required>
                     </div>
                     
@@ -656,18 +987,7 @@ HTML_TEMPLATE = """
             <!-- Voice Library Tab -->
             <div id="voices-tab" class="tab-content">
                 <h3>ElevenLabs Voice Library</h3>
-                <div class="voice-grid">
-                    {% for voice in elevenlabs_voices %}
-                    <div class="voice-card" onclick="testVoice('{{ voice.id }}')">
-                        <div class="voice-name">{{ voice.name }}</div>
-                        <div class="voice-category">{{ voice.category }}</div>
-                        <div class="voice-description">{{ voice.description }}</div>
-                        <button type="button" class="btn" style="margin-top: 10px; padding: 8px 15px; font-size: 14px;">
-                            Test Voice
-                        </button>
-                    </div>
-                    {% endfor %}
-                </div>
+                <div class="voice-grid" id="voice-library"></div>
             </div>
             
             <!-- Voice Cloning Tab -->
@@ -716,277 +1036,56 @@ HTML_TEMPLATE = """
         </div>
     </div>
     
-    <script>
-        let selectedVoiceId = null;
-        
-        // Tab switching
-        function switchTab(tabName) {
-            document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
-            document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
-            
-            event.target.classList.add('active');
-            document.getElementById(tabName + '-tab').classList.add('active');
-        }
-        
-        // Voice selection
-        function selectVoice(voiceId, element) {
-            document.querySelectorAll('.voice-card').forEach(card => card.classList.remove('selected'));
-            element.classList.add('selected');
-            selectedVoiceId = voiceId;
-            document.getElementById('selected-voice').value = voiceId;
-        }
-        
-        // Range input updates
-        ['stability', 'similarity', 'style'].forEach(id => {
-            document.getElementById(id).oninput = function() {
-                document.getElementById(id + '-value').textContent = this.value;
-            }
-        });
-        
-        // File handling for STT
-        function handleFileSelect(input) {
-            const file = input.files[0];
-            if (file) {
-                const fileInfo = document.getElementById('file-info');
-                fileInfo.innerHTML = `
-                    <strong>Selected:</strong> ${file.name}<br>
-                    <strong>Size:</strong> ${(file.size / 1024 / 1024).toFixed(2)} MB<br>
-                    <strong>Type:</strong> ${file.type}
-                `;
-                fileInfo.style.display = 'block';
-                document.getElementById('stt-btn').disabled = false;
-            }
-        }
-        
-        // File handling for voice cloning
-        function handleCloneFileSelect(input) {
-            const file = input.files[0];
-            if (file) {
-                const fileInfo = document.getElementById('clone-file-info');
-                fileInfo.innerHTML = `
-                    <strong>Selected:</strong> ${file.name}<br>
-                    <strong>Size:</strong> ${(file.size / 1024 / 1024).toFixed(2)} MB<br>
-                    <strong>Type:</strong> ${file.type}
-                `;
-                fileInfo.style.display = 'block';
-                document.getElementById('clone-btn').disabled = false;
-            }
-        }
-        
-        // TTS Form submission
-        async function generateSpeech(event) {
-            event.preventDefault();
-            
-            if (!selectedVoiceId) {
-                alert('Please select a voice first.');
-                return;
-            }
-            
-            const form = event.target;
-            const formData = new FormData(form);
-            
-            document.getElementById('tts-loading').style.display = 'block';
-            document.getElementById('tts-result').style.display = 'none';
-            
-            try {
-                const response = await fetch('/generate_speech', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    const audioPlayer = document.getElementById('audio-player');
-                    const downloadLink = document.getElementById('download-link');
-                    
-                    audioPlayer.src = '/download/' + result.filename;
-                    downloadLink.href = '/download/' + result.filename;
-                    downloadLink.download = result.filename;
-                    
-                    document.getElementById('tts-result').style.display = 'block';
-                } else {
-                    alert('Error: ' + result.error);
-                }
-            } catch (error) {
-                alert('Error generating speech: ' + error.message);
-            }
-            
-            document.getElementById('tts-loading').style.display = 'none';
-        }
-        
-        // STT Form submission
-        async function convertSpeechToText(event) {
-            event.preventDefault();
-            
-            const form = event.target;
-            const formData = new FormData(form);
-            
-            document.getElementById('stt-loading').style.display = 'block';
-            document.getElementById('stt-result').style.display = 'none';
-            
-            try {
-                const response = await fetch('/speech_to_text', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    document.getElementById('transcribed-text').textContent = result.text;
-                    document.getElementById('stt-result').style.display = 'block';
-                } else {
-                    alert('Error: ' + result.error);
-                }
-            } catch (error) {
-                alert('Error converting speech: ' + error.message);
-            }
-            
-            document.getElementById('stt-loading').style.display = 'none';
-        }
-        
-        // Voice cloning form submission
-        async function cloneVoice(event) {
-            event.preventDefault();
-            
-            const form = event.target;
-            const formData = new FormData(form);
-            
-            document.getElementById('clone-loading').style.display = 'block';
-            document.getElementById('clone-result').style.display = 'none';
-            
-            try {
-                const response = await fetch('/clone_voice', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    document.getElementById('clone-message').innerHTML = `
-                        <strong>✅ Voice cloned successfully!</strong><br>
-                        <strong>Voice ID:</strong> ${result.voice_id}<br>
-                        <strong>Name:</strong> ${result.voice_name}<br>
-                        <em>You can now use this voice in the Text-to-Speech tab.</em>
-                    `;
-                    
-                    // Refresh the page to load the new voice
-                    setTimeout(() => {
-                        location.reload();
-                    }, 3000);
-                } else {
-                    document.getElementById('clone-message').innerHTML = `
-                        <strong>Voice cloning failed:</strong><br>
-                        ${result.error}
-                    `;
-                }
-                
-                document.getElementById('clone-result').style.display = 'block';
-            } catch (error) {
-                document.getElementById('clone-message').innerHTML = `
-                    <strong>Error:</strong><br>
-                    ${error.message}
-                `;
-                document.getElementById('clone-result').style.display = 'block';
-            }
-            
-            document.getElementById('clone-loading').style.display = 'none';
-        }
-        
-        // Copy to clipboard
-        function copyToClipboard() {
-            const text = document.getElementById('transcribed-text').textContent;
-            navigator.clipboard.writeText(text).then(() => {
-                alert('Text copied to clipboard!');
-            });
-        }
-        
-        // Test voice
-        function testVoice(voiceId) {
-            const testText = "Hello, this is a voice test using ElevenLabs AI. How does this sound?";
-            
-            fetch('/test_voice', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    text: testText,
-                    voice_id: voiceId
-                })
-            })
-            .then(response => response.json())
-            .then(result => {
-                if (result.success) {
-                    const audio = new Audio('/download/' + result.filename);
-                    audio.play();
-                } else {
-                    alert('Error testing voice: ' + result.error);
-                }
-            });
-        }
-        
-        // Drag and drop functionality
-        const uploadAreas = document.querySelectorAll('.upload-area');
-        
-        uploadAreas.forEach(uploadArea => {
-            ['dragenter', 'dragover', 'dragleave', 'drop'].forEach(eventName => {
-                uploadArea.addEventListener(eventName, preventDefaults, false);
-            });
-            
-            ['dragenter', 'dragover'].forEach(eventName => {
-                uploadArea.addEventListener(eventName, () => uploadArea.classList.add('dragover'), false);
-            });
-            
-            ['dragleave', 'drop'].forEach(eventName => {
-                uploadArea.addEventListener(eventName, () => uploadArea.classList.remove('dragover'), false);
-            });
-            
-            uploadArea.addEventListener('drop', handleDrop, false);
-        });
-        
-        function preventDefaults(e) {
-            e.preventDefault();
-            e.stopPropagation();
-        }
-        
-        function handleDrop(e) {
-            const dt = e.dataTransfer;
-            const files = dt.files;
-            
-            // Determine which upload area this is
-            if (e.target.closest('#stt-tab')) {
-                document.getElementById('audio-file').files = files;
-                handleFileSelect(document.getElementById('audio-file'));
-            } else if (e.target.closest('#clone-tab')) {
-                document.getElementById('clone-audio-file').files = files;
-                handleCloneFileSelect(document.getElementById('clone-audio-file'));
-            }
-        }
-        
-        // Auto-select first voice if available
-        document.addEventListener('DOMContentLoaded', function() {
-            const firstVoice = document.querySelector('.voice-card');
-            if (firstVoice) {
-                firstVoice.click();
-            }
-        });
-    </script>
+    <script src="{{ url_for('static_asset', filename='app.js', v=versions['app.js']) }}"></script>
 </body>
 </html>
 """
 
+# Minified and compiled once at import instead of on every render_template_string call
+INDEX_TEMPLATE = app.jinja_env.from_string(minify_html(HTML_TEMPLATE))
+
+@functools.lru_cache(maxsize=None)
+def render_index(script_root):
+    """Render and gzip the page once per mount point; nothing else in it varies per request"""
+    body = INDEX_TEMPLATE.render(versions={name: asset[2] for name, asset in STATIC_ASSETS.items()},
+                                 max_chars=MAX_TTS_CHARS, test_voice_text=TEST_VOICE_TEXT).encode()
+    return body, gzip.compress(body, compresslevel=9)
+
 @app.route('/')
 def index():
-    elevenlabs_voices = tts_engine.get_elevenlabs_voices()
-    api_connected = len(elevenlabs_voices) > 0
+    # The page no longer waits on ElevenLabs; voices load from /api/voices.
+    # Rendered on the first request rather than at import, since url_for
+    # needs a request to know where the app is mounted.
+    body, gzipped = render_index(request.script_root)
+    return precompressed_response(body, gzipped, 'text/html')
+
+# Takes precedence over Flask's generic static route for these two files
+@app.route('/static/<any("app.css", "app.js"):filename>')
+def static_asset(filename):
+    body, gzipped, _ = STATIC_ASSETS[filename]
+    response = precompressed_response(body, gzipped, STATIC_MIMETYPES[filename])
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@app.route('/api/voices')
+def api_voices():
+    voices = tts_engine.get_elevenlabs_voices()
     
-    return render_template_string(HTML_TEMPLATE, 
-                                elevenlabs_voices=elevenlabs_voices,
-                                api_connected=api_connected,
-                                voice_count=len(elevenlabs_voices))
+    # Name test clips that are already cached so "Test Voice" can play them
+    # straight from /download instead of going through /stream_speech
+    listed = []
+    for voice in voices:
+        test_path = tts_engine.speech_cache_path(TEST_VOICE_TEXT, voice['id'])
+        if os.path.exists(test_path):
+            voice = dict(voice, test_audio=os.path.basename(test_path))
+        listed.append(voice)
+    
+    response = jsonify(listed)
+    # Let browsers/proxies reuse the list, but never cache a failed lookup
+    if voices:
+        response.cache_control.public = True
+        response.cache_control.max_age = VOICES_CACHE_TTL
+    return response
 
 @app.route('/generate_speech', methods=['POST'])
 def generate_speech():
@@ -1000,20 +1099,34 @@ def generate_speech():
         if not text:
             return jsonify({'success': False, 'error': 'No text provided'})
         
+        if len(text) > MAX_TTS_CHARS:
+            return jsonify({'success': False, 'error': f'Text is too long (max {MAX_TTS_CHARS} characters)'})
+        
         if not voice_id:
             return jsonify({'success': False, 'error': 'No voice selected'})
         
-        filepath = tts_engine.text_to_speech_elevenlabs(text, voice_id, stability, similarity, style)
-        
-        if filepath and os.path.exists(filepath):
-            filename = os.path.basename(filepath)
-            return jsonify({'success': True, 'filename': filename})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to generate speech'})
+        job_id = submit_speech_job(text, voice_id, stability, similarity, style)
+        return jsonify({'success': True, 'job_id': job_id})
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/status/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    future = job[1]
+    if not future.done():
+        return jsonify({'success': True, 'status': 'pending'})
+    
+    try:
+        result = future.result()
+    except Exception as e:
+        return jsonify({'success': False, 'status': 'failed', 'error': str(e)})
+    return jsonify({'success': True, 'status': 'finished', **result})
+
 @app.route('/speech_to_text', methods=['POST'])
 def speech_to_text():
     try:
@@ -1026,20 +1139,13 @@ def speech_to_text():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4().hex[:8]}_{filename}"
+            unique_filename = f"{unique_token()}_{filename}"
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(filepath)
-            
-            # Convert speech to text
-            text = tts_engine.speech_to_text(filepath)
-            
-            # Clean up uploaded file
-            os.remove(filepath)
+            save_upload(file, filepath)
             
-            if text:
-                return jsonify({'success': True, 'text': text})
-            else:
-                return jsonify({'success': False, 'error': 'Could not recognize speech'})
+            # Decoding and Google recognition run in the background
+            job_id = submit_job(transcribe_upload, filepath)
+            return jsonify({'success': True, 'job_id': job_id})
         else:
             return jsonify({'success': False, 'error': 'Invalid file type'})
             
@@ -1056,17 +1162,72 @@ def test_voice():
         if not voice_id:
             return jsonify({'success': False, 'error': 'No voice ID provided'})
         
-        filepath = tts_engine.text_to_speech_elevenlabs(text, voice_id)
+        if len(text) > MAX_TTS_CHARS:
+            return jsonify({'success': False, 'error': f'Text is too long (max {MAX_TTS_CHARS} characters)'})
         
-        if filepath and os.path.exists(filepath):
-            filename = os.path.basename(filepath)
-            return jsonify({'success': True, 'filename': filename})
-        else:
+        # Still answers synchronously, but runs on the shared speech pool so
+        # ElevenLabs concurrency stays bounded and an identical pending
+        # request (e.g. the same voice tested twice) is joined, not repeated
+        job_id = submit_speech_job(text, voice_id)
+        try:
+            result = jobs[job_id][1].result(timeout=ELEVENLABS_TIMEOUT[1])
+        except Exception:
             return jsonify({'success': False, 'error': 'Failed to generate test audio'})
+        return jsonify({'success': True, 'filename': result['filename']})
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/stream_speech', methods=['GET'])
+def stream_speech():
+    text = request.args.get('text', '').strip()
+    voice_id = request.args.get('voice_id', '')
+    try:
+        stability = float(request.args.get('stability', 0.5))
+        similarity = float(request.args.get('similarity', 0.5))
+        style = float(request.args.get('style', 0.0))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid voice settings'}), 400
+    
+    if not text:
+        return jsonify({'success': False, 'error': 'No text provided'}), 400
+    
+    if len(text) > MAX_TTS_CHARS:
+        return jsonify({'success': False, 'error': f'Text is too long (max {MAX_TTS_CHARS} characters)'}), 400
+    
+    if not voice_id:
+        return jsonify({'success': False, 'error': 'No voice selected'}), 400
+    
+    filepath = tts_engine.speech_cache_path(text, voice_id, stability, similarity, style)
+    if not touch_cached_file(filepath):
+        # Werkzeug answers HEAD for GET routes but never iterates the body;
+        # don't start (and pay for) a synthesis nobody will read
+        if request.method == 'HEAD':
+            return Response(mimetype='audio/mpeg')
+        
+        try:
+            stream = tts_engine.stream_speech_elevenlabs(text, voice_id, stability, similarity, style)
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 502
+        
+        # None: an identical request finished the file while this one waited
+        if stream is not None:
+            chunks, release = stream
+            response = Response(chunks, mimetype='audio/mpeg')
+            response.call_on_close(release)
+            return response
+    
+    # Same query, same audio: a stable ETag and a private max-age let the
+    # <audio> element replay and seek (206 ranges) from the browser cache.
+    # Private, since the text being spoken is in the URL.
+    # max_age goes through send_file, which otherwise adds no-cache; it
+    # also marks the response public, which is swapped for private here.
+    response = send_file(filepath, mimetype='audio/mpeg', etag=os.path.basename(filepath),
+                         max_age=FILE_MAX_AGE)
+    response.cache_control.public = None
+    response.cache_control.private = True
+    return response
+
 @app.route('/clone_voice', methods=['POST'])
 def clone_voice():
     try:
@@ -1085,71 +1246,161 @@ def clone_voice():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4().hex[:8]}_{filename}"
+            unique_filename = f"{unique_token()}_{filename}"
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(filepath)
-            
-            # Convert to MP3 if needed (ElevenLabs prefers MP3)
-            if not filepath.endswith('.mp3'):
-                audio = AudioSegment.from_file(filepath)
-                mp3_path = filepath.rsplit('.', 1)[0] + '.mp3'
-                audio.export(mp3_path, format="mp3")
-                os.remove(filepath)
-                filepath = mp3_path
+            save_upload(file, filepath)
             
-            # Clone voice using ElevenLabs
-            voice_id = tts_engine.clone_voice_from_audio(filepath, voice_name, voice_description)
-            
-            # Clean up uploaded file
-            os.remove(filepath)
-            
-            if voice_id:
-                return jsonify({
-                    'success': True, 
-                    'voice_id': voice_id,
-                    'voice_name': voice_name,
-                    'message': 'Voice cloned successfully!'
-                })
-            else:
-                return jsonify({'success': False, 'error': 'Voice cloning failed'})
+            # Conversion and the ElevenLabs upload run in the background
+            job_id = submit_job(clone_upload, filepath, voice_name, voice_description)
+            return jsonify({'success': True, 'job_id': job_id})
         else:
             return jsonify({'success': False, 'error': 'Invalid file type'})
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.teardown_request
+def remove_spooled_uploads(exc=None):
+    """Delete spooled uploads a route didn't keep (validation errors,
+    aborted or oversized bodies etc.)"""
+    for f in request.__dict__.get('spooled_files', ()):
+        f.close()
+        try:
+            os.remove(f.name)
+        except FileNotFoundError:
+            pass  # already moved into place by save_upload
+
+@app.after_request
+def compress_response(response):
+    """Brotli- or gzip-compress text responses for clients that accept it"""
+    if (response.mimetype not in COMPRESS_MIMETYPES or response.status_code != 200
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    use_brotli = brotli is not None and request.accept_encodings['br'] > 0
+    if not use_brotli and request.accept_encodings['gzip'] <= 0:
+        return response
+    
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    
+    if use_brotli:
+        response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+        response.headers['Content-Encoding'] = 'br'
+    else:
+        response.set_data(gzip.compress(body, compresslevel=COMPRESS_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
-        filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-        if os.path.exists(filepath):
-            return send_file(filepath, as_attachment=True)
+        if X_ACCEL_REDIRECT_PREFIX:
+            # Generated names are always plain; anything else ('..', encoded
+            # separators) must not reach nginx, and a missing file must not
+            # get the immutable caching below
+            if secure_filename(filename) != filename or not os.path.isfile(
+                    os.path.join(app.config['OUTPUT_FOLDER'], filename)):
+                raise NotFound()
+            # nginx serves the body from its internal location
+            response = Response(mimetype='audio/mpeg')
+            response.headers['X-Accel-Redirect'] = X_ACCEL_REDIRECT_PREFIX + url_quote(filename)
+            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+            response.set_etag(filename)
+            response.cache_control.public = True
+            response.cache_control.max_age = DOWNLOAD_MAX_AGE
         else:
-            return "File not found", 404
+            # Safe-joins the name and 404s on a missing file without a separate stat;
+            # the filename is a stable ETag, mtime-based ones change on every cache hit.
+            # max_age must go through send_file, which otherwise adds no-cache.
+            response = send_from_directory(app.config['OUTPUT_FOLDER'], filename,
+                                           as_attachment=True, etag=filename,
+                                           max_age=DOWNLOAD_MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+    except NotFound:
+        return "File not found", 404
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 # Cleanup old files (run periodically)
 def cleanup_old_files():
-    """Remove files older than 1 hour"""
-    import time
+    """Remove files unused for FILE_MAX_AGE seconds and forget stale jobs"""
     current_time = time.time()
+    upload_files.remove_expired()
+    output_files.remove_expired()
     
-    for folder in [app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']]:
-        for filename in os.listdir(folder):
-            filepath = os.path.join(folder, filename)
-            if os.path.isfile(filepath):
-                file_age = current_time - os.path.getctime(filepath)
-                if file_age > 3600:  # 1 hour
-                    try:
-                        os.remove(filepath)
-                        print(f"Cleaned up old file: {filename}")
-                    except:
-                        pass
+    # Forget finished jobs nobody collected
+    for job_id, (created_at, future) in list(jobs.items()):
+        if future.done() and current_time - created_at > JOB_TTL:
+            jobs.pop(job_id, None)
+    with speech_jobs_lock:
+        for filepath, job_id in list(speech_jobs.items()):
+            if job_id not in jobs:
+                speech_jobs.pop(filepath, None)
+
+def cleanup_loop():
+    last_scan = 0
+    while True:
+        # An error in one pass (e.g. a folder that vanished) must not end the
+        # thread, or files would pile up until the next restart
+        try:
+            # Full directory scan only once per FILE_MAX_AGE, to pick up files
+            # written before startup or never tracked
+            if time.time() - last_scan >= FILE_MAX_AGE:
+                upload_files.scan(app.config['UPLOAD_FOLDER'])
+                output_files.scan(app.config['OUTPUT_FOLDER'])
+                last_scan = time.time()
+            cleanup_old_files()
+        except Exception:
+            logger.exception("File cleanup failed")
+        
+        # Wake up when the next file is due, at least every CLEANUP_INTERVAL
+        expiries = [t for t in (upload_files.next_expiry(), output_files.next_expiry()) if t]
+        delay = min(expiries) - time.time() if expiries else CLEANUP_INTERVAL
+        time.sleep(min(max(delay, 1), CLEANUP_INTERVAL))
+
+cleanup_thread = None
+
+def start_background_tasks():
+    """Start the cleanup thread and warm up ElevenLabs"""
+    global cleanup_thread
+    cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
+    cleanup_thread.start()
+    
+    # Open the TLS connection to ElevenLabs and fill the voice cache in the
+    # background, so the first visitor doesn't wait on the handshake or the lookup
+    if ELEVENLABS_API_KEY:
+        threading.Thread(target=tts_engine.get_elevenlabs_voices, daemon=True).start()
+
+def restart_after_fork():
+    """Re-create per-process state in a worker forked from a preloaded app
+    
+    Called from gunicorn's post_fork hook when preload_app is on: threads
+    don't survive fork(), and locks, futures and pooled connections must
+    not be shared with the parent process.
+    """
+    global log_queue, log_listener
+    log_queue = queue.Queue(-1)
+    _queue_handler.queue = log_queue
+    log_listener = logging.handlers.QueueListener(log_queue, _log_handler)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    
+    tts_engine.after_fork()
+    upload_files.after_fork()
+    output_files.after_fork()
+    start_background_tasks()
 
-# Start cleanup thread
-cleanup_thread = threading.Thread(target=lambda: [time.sleep(3600), cleanup_old_files()], daemon=True)
-cleanup_thread.start()
+# A preloading gunicorn master (PRELOAD_APP=1, set by gunicorn.conf.py) must
+# not run these threads: anything they hold when a worker forks (a pending
+# voice fetch, a queue lock) would stay held in that worker forever.
+# Workers start their own from post_fork instead.
+if os.environ.get('PRELOAD_APP') != '1':
+    start_background_tasks()
 
 if __name__ == '__main__':
     print("\n" + "="*50)
@@ -1174,11 +1425,13 @@ if __name__ == '__main__':
     print(f"\n🌐 Platform: {platform.system()}")
     print("\n📋 Installation Requirements:")
     print("   pip install flask speechrecognition pydub requests")
+    print("   Production: gunicorn app:app (see gunicorn.conf.py)")
     print("\n🚀 Starting server...")
     print("   Open http://localhost:5000 in your browser")
     print("="*50)
     
     # Get port from environment (for cloud deployment)
     port = int(os.environ.get('PORT', 5000))
-    # Run the Flask application
+    # Werkzeug's development server, for local debugging only; deployments
+    # run gunicorn (Procfile / gunicorn.conf.py)
     app.run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for Voice Studio
+Picked up automatically by: gunicorn app:app
+"""
+
+import os
+
+# Every endpoint is I/O bound on ElevenLabs or Google STT. gevent workers
+# monkey-patch sockets, threads and subprocesses before the app is imported,
+# so the blocking requests calls yield to other greenlets while they wait.
+# GUNICORN_WORKER_CLASS=gthread uses plain OS threads instead (no gevent).
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = 1000
+threads = int(os.environ.get('GUNICORN_THREADS', 32))  # gthread only
+
+# Background TTS jobs live in the worker's memory and /status polls must
+# reach the process that accepted the job, so scale with greenlets/threads,
+# not workers
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Import the app once in the master and fork workers from it, so Flask,
+# requests and the minified/gzipped STATIC_ASSETS are shared copy-on-write.
+# The page render, voice cache, speech_recognition and pydub are still
+# loaded per worker, on first use. With the default single worker this
+# saves no memory; it only pays off when WEB_CONCURRENCY > 1.
+# Not with gevent: it has to monkey-patch before the app is imported.
+preload_app = worker_class != 'gevent'
+if preload_app:
+    # app.py then leaves its background threads to post_fork
+    os.environ['PRELOAD_APP'] = '1'
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app
+        app.restart_after_fork()
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+timeout = 120
+# Keep idle connections from a reverse proxy open between requests
+keepalive = 5
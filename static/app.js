@@ -0,0 +1,392 @@
+let selectedVoiceId = null;
+
+// Stay well under the request-line limits of gunicorn/proxies (~4 KB)
+const MAX_STREAM_URL_LENGTH = 2000;
+
+// Tab switching
+function switchTab(tabName) {
+    document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+    document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+
+    event.target.classList.add('active');
+    document.getElementById(tabName + '-tab').classList.add('active');
+}
+
+// Voice selection
+function selectVoice(voiceId, element) {
+    document.querySelectorAll('.voice-card').forEach(card => card.classList.remove('selected'));
+    element.classList.add('selected');
+    selectedVoiceId = voiceId;
+    document.getElementById('selected-voice').value = voiceId;
+}
+
+// Range input updates
+['stability', 'similarity', 'style'].forEach(id => {
+    document.getElementById(id).oninput = function() {
+        document.getElementById(id + '-value').textContent = this.value;
+    }
+});
+
+// File handling for STT
+function handleFileSelect(input) {
+    const file = input.files[0];
+    if (file) {
+        const fileInfo = document.getElementById('file-info');
+        fileInfo.innerHTML = `
+            <strong>Selected:</strong> ${file.name}<br>
+            <strong>Size:</strong> ${(file.size / 1024 / 1024).toFixed(2)} MB<br>
+            <strong>Type:</strong> ${file.type}
+        `;
+        fileInfo.style.display = 'block';
+        document.getElementById('stt-btn').disabled = false;
+    }
+}
+
+// File handling for voice cloning
+function handleCloneFileSelect(input) {
+    const file = input.files[0];
+    if (file) {
+        const fileInfo = document.getElementById('clone-file-info');
+        fileInfo.innerHTML = `
+            <strong>Selected:</strong> ${file.name}<br>
+            <strong>Size:</strong> ${(file.size / 1024 / 1024).toFixed(2)} MB<br>
+            <strong>Type:</strong> ${file.type}
+        `;
+        fileInfo.style.display = 'block';
+        document.getElementById('clone-btn').disabled = false;
+    }
+}
+
+// TTS Form submission
+async function generateSpeech(event) {
+    event.preventDefault();
+
+    if (!selectedVoiceId) {
+        alert('Please select a voice first.');
+        return;
+    }
+
+    const form = event.target;
+    const formData = new FormData(form);
+
+    // Stream straight into the player so playback starts with the first
+    // synthesized chunk; the finished audio is cached server-side, so
+    // replays and the download link don't call ElevenLabs again
+    const streamUrl = '/stream_speech?' + new URLSearchParams(formData);
+    const audioPlayer = document.getElementById('audio-player');
+    audioPlayer.oncanplay = audioPlayer.onerror = null;
+
+    if (streamUrl.length <= MAX_STREAM_URL_LENGTH) {
+        const downloadLink = document.getElementById('download-link');
+        const loading = document.getElementById('tts-loading');
+        const result = document.getElementById('tts-result');
+
+        loading.style.display = 'block';
+        result.style.display = 'none';
+
+        // Show the player once the first chunk is playable
+        let started = false;
+        audioPlayer.oncanplay = () => {
+            started = true;
+            loading.style.display = 'none';
+            result.style.display = 'block';
+        };
+
+        // The media element only reports a generic error. If the stream
+        // never started, request the URL again to show the JSON error the
+        // server sent (no voice, quota...); after that a retry would just
+        // pay for another synthesis
+        audioPlayer.onerror = async () => {
+            audioPlayer.oncanplay = audioPlayer.onerror = null;
+            loading.style.display = 'none';
+            result.style.display = 'none';
+
+            let message = 'Could not play the generated audio';
+            if (started) {
+                alert('Error generating speech: ' + message);
+                return;
+            }
+            const controller = new AbortController();
+            try {
+                const response = await fetch(streamUrl, { signal: controller.signal });
+                if (response.ok) {
+                    controller.abort();
+                } else {
+                    message = (await response.json()).error || message;
+                }
+            } catch (error) {
+                // keep the generic message
+            }
+            alert('Error generating speech: ' + message);
+        };
+
+        audioPlayer.src = streamUrl;
+        downloadLink.href = streamUrl;
+        downloadLink.download = 'speech.mp3';
+
+        // Failures surface through onerror; a blocked autoplay just leaves
+        // the player waiting for the user to press play
+        audioPlayer.play().catch(() => {});
+        return;
+    }
+
+    // Text too long to fit in a URL: generate it in a background job
+    document.getElementById('tts-loading').style.display = 'block';
+    document.getElementById('tts-result').style.display = 'none';
+
+    try {
+        const response = await fetch('/generate_speech', {
+            method: 'POST',
+            body: formData
+        });
+
+        const job = await response.json();
+        const result = job.success ? await waitForJob(job.job_id) : job;
+
+        if (result.success) {
+            const downloadLink = document.getElementById('download-link');
+
+            audioPlayer.src = '/download/' + result.filename;
+            downloadLink.href = '/download/' + result.filename;
+            downloadLink.download = result.filename;
+
+            document.getElementById('tts-result').style.display = 'block';
+        } else {
+            alert('Error: ' + result.error);
+        }
+    } catch (error) {
+        alert('Error generating speech: ' + error.message);
+    }
+
+    document.getElementById('tts-loading').style.display = 'none';
+}
+
+// Poll a background job until it has finished
+async function waitForJob(jobId) {
+    while (true) {
+        const response = await fetch('/status/' + jobId);
+        const result = await response.json();
+
+        if (!result.success || result.status !== 'pending') {
+            return result;
+        }
+
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
+// STT Form submission
+async function convertSpeechToText(event) {
+    event.preventDefault();
+
+    const form = event.target;
+    const formData = new FormData(form);
+
+    document.getElementById('stt-loading').style.display = 'block';
+    document.getElementById('stt-result').style.display = 'none';
+
+    try {
+        const response = await fetch('/speech_to_text', {
+            method: 'POST',
+            body: formData
+        });
+
+        const job = await response.json();
+        const result = job.success ? await waitForJob(job.job_id) : job;
+
+        if (result.success) {
+            document.getElementById('transcribed-text').textContent = result.text;
+            document.getElementById('stt-result').style.display = 'block';
+        } else {
+            alert('Error: ' + result.error);
+        }
+    } catch (error) {
+        alert('Error converting speech: ' + error.message);
+    }
+
+    document.getElementById('stt-loading').style.display = 'none';
+}
+
+// Voice cloning form submission
+async function cloneVoice(event) {
+    event.preventDefault();
+
+    const form = event.target;
+    const formData = new FormData(form);
+
+    document.getElementById('clone-loading').style.display = 'block';
+    document.getElementById('clone-result').style.display = 'none';
+
+    try {
+        const response = await fetch('/clone_voice', {
+            method: 'POST',
+            body: formData
+        });
+
+        const job = await response.json();
+        const result = job.success ? await waitForJob(job.job_id) : job;
+
+        if (result.success) {
+            document.getElementById('clone-message').innerHTML = `
+                <strong>✅ Voice cloned successfully!</strong><br>
+                <strong>Voice ID:</strong> ${result.voice_id}<br>
+                <strong>Name:</strong> ${result.voice_name}<br>
+                <em>You can now use this voice in the Text-to-Speech tab.</em>
+            `;
+
+            // Reload the voice list to pick up the new voice
+            setTimeout(() => {
+                loadVoices('reload');
+            }, 3000);
+        } else {
+            document.getElementById('clone-message').innerHTML = `
+                <strong>Voice cloning failed:</strong><br>
+                ${result.error}
+            `;
+        }
+
+        document.getElementById('clone-result').style.display = 'block';
+    } catch (error) {
+        document.getElementById('clone-message').innerHTML = `
+            <strong>Error:</strong><br>
+            ${error.message}
+        `;
+        document.getElementById('clone-result').style.display = 'block';
+    }
+
+    document.getElementById('clone-loading').style.display = 'none';
+}
+
+// Copy to clipboard
+function copyToClipboard() {
+    const text = document.getElementById('transcribed-text').textContent;
+    navigator.clipboard.writeText(text).then(() => {
+        alert('Text copied to clipboard!');
+    });
+}
+
+// Test voice
+function testVoice(voiceId, testAudio) {
+    // A clip the server already has plays from /download, which the browser caches
+    if (testAudio) {
+        const audio = new Audio('/download/' + encodeURIComponent(testAudio));
+        // Evicted since the voice list was loaded: stream it instead
+        audio.play().catch(() => testVoice(voiceId));
+        return;
+    }
+
+    // Same sentence the server uses to find cached test clips
+    const testText = document.body.dataset.testVoiceText;
+    const params = new URLSearchParams({ text: testText, voice_id: voiceId });
+
+    // Streamed, so playback starts with the first synthesized chunk
+    const audio = new Audio('/stream_speech?' + params);
+    audio.play().catch(error => alert('Error testing voice: ' + error.message));
+}
+
+// Drag and drop functionality
+const uploadAreas = document.querySelectorAll('.upload-area');
+
+uploadAreas.forEach(uploadArea => {
+    ['dragenter', 'dragover', 'dragleave', 'drop'].forEach(eventName => {
+        uploadArea.addEventListener(eventName, preventDefaults, false);
+    });
+
+    ['dragenter', 'dragover'].forEach(eventName => {
+        uploadArea.addEventListener(eventName, () => uploadArea.classList.add('dragover'), false);
+    });
+
+    ['dragleave', 'drop'].forEach(eventName => {
+        uploadArea.addEventListener(eventName, () => uploadArea.classList.remove('dragover'), false);
+    });
+
+    uploadArea.addEventListener('drop', handleDrop, false);
+});
+
+function preventDefaults(e) {
+    e.preventDefault();
+    e.stopPropagation();
+}
+
+function handleDrop(e) {
+    const dt = e.dataTransfer;
+    const files = dt.files;
+
+    // Determine which upload area this is
+    if (e.target.closest('#stt-tab')) {
+        document.getElementById('audio-file').files = files;
+        handleFileSelect(document.getElementById('audio-file'));
+    } else if (e.target.closest('#clone-tab')) {
+        document.getElementById('clone-audio-file').files = files;
+        handleCloneFileSelect(document.getElementById('clone-audio-file'));
+    }
+}
+
+// Build a voice card; text goes in via textContent so voice names
+// and descriptions are never interpreted as HTML
+function createVoiceCard(voice, description) {
+    const card = document.createElement('div');
+    card.className = 'voice-card';
+
+    [['voice-name', voice.name], ['voice-category', voice.category], ['voice-description', description]]
+        .forEach(([className, text]) => {
+            const div = document.createElement('div');
+            div.className = className;
+            div.textContent = text;
+            card.appendChild(div);
+        });
+
+    return card;
+}
+
+// Load voices from /api/voices and fill the selection and library grids
+async function loadVoices(cacheMode = 'default') {
+    let voices = [];
+    try {
+        const response = await fetch('/api/voices', { cache: cacheMode });
+        voices = await response.json();
+    } catch (error) {
+        voices = [];
+    }
+
+    const status = document.getElementById('api-status');
+    if (voices.length > 0) {
+        status.className = 'api-status api-connected';
+        status.textContent = `ElevenLabs API Connected - ${voices.length} voices available`;
+    } else {
+        status.className = 'api-status api-disconnected';
+        status.textContent = 'ElevenLabs API Key Required - Add ELEVENLABS_API_KEY to environment';
+    }
+
+    const selection = document.getElementById('voice-selection');
+    const library = document.getElementById('voice-library');
+    selection.innerHTML = '';
+    library.innerHTML = '';
+
+    voices.forEach(voice => {
+        const description = voice.description || '';
+
+        const card = createVoiceCard(voice, description.slice(0, 100) + '...');
+        card.dataset.voiceId = voice.id;
+        card.onclick = () => selectVoice(voice.id, card);
+        selection.appendChild(card);
+
+        const libraryCard = createVoiceCard(voice, description);
+        const testButton = document.createElement('button');
+        testButton.type = 'button';
+        testButton.className = 'btn';
+        testButton.style.cssText = 'margin-top: 10px; padding: 8px 15px; font-size: 14px;';
+        testButton.textContent = 'Test Voice';
+        libraryCard.appendChild(testButton);
+        libraryCard.onclick = () => testVoice(voice.id, voice.test_audio);
+        library.appendChild(libraryCard);
+    });
+
+    // Auto-select first voice if available
+    const firstVoice = selection.querySelector('.voice-card');
+    if (firstVoice) {
+        firstVoice.click();
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => loadVoices());